@@ -6,7 +6,9 @@ Adds a centered dot matrix overlay to PDF documents.
 from __future__ import annotations
 
 import argparse
-import copy
+import functools
+import gc
+import itertools
 import math
 import os
 import platform
@@ -15,10 +17,13 @@ import sys
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
+from typing import TYPE_CHECKING, cast
 
-import tomli
-from pypdf import PdfReader, PdfWriter
-from reportlab.pdfgen.canvas import Canvas
+# The PDF libraries are imported where they are used, so that --help and
+# argument errors don't pay for loading them
+if TYPE_CHECKING:
+    from pypdf import PageObject, PdfWriter
+    from pypdf.generic import IndirectObject, NameObject
 
 
 # Unit conversion constants
@@ -26,6 +31,33 @@ POINTS_PER_INCH = 72
 MM_PER_INCH = 25.4
 MM_TO_POINTS = POINTS_PER_INCH / MM_PER_INCH
 
+# Distance of a cubic Bezier control point from the arc ends, per unit radius,
+# for approximating a quarter circle
+CIRCLE_BEZIER_K = 4 * (math.sqrt(2) - 1) / 3
+
+# Subpath for one dot: a circle from four Bezier curves. x and y hold the
+# dot's formatted coordinates at offsets (-radius, -handle, 0, +handle, +radius)
+# from its center, where handle is CIRCLE_BEZIER_K * radius.
+DOT_PATH_TEMPLATE = (
+    "{x[4]} {y[2]} m "
+    "{x[4]} {y[3]} {x[3]} {y[4]} {x[2]} {y[4]} c "
+    "{x[1]} {y[4]} {x[0]} {y[3]} {x[0]} {y[2]} c "
+    "{x[0]} {y[1]} {x[1]} {y[0]} {x[2]} {y[0]} c "
+    "{x[3]} {y[0]} {x[4]} {y[1]} {x[4]} {y[2]} c h\n"
+)
+
+# Content stream for a white filled rectangle: x, y, width, height
+WHITE_RECT_TEMPLATE = "q 1 1 1 rg %.4f %.4f %.4f %.4f re f Q\n"
+
+# Fewest overlays to render before a process pool pays for starting its
+# workers: one overlay takes about 20 ms, starting the pool about 0.4 s
+MIN_POOLED_OVERLAYS = 48
+
+# Rendered dot matrix overlays, keyed on (width, height, split_border, config);
+# the oldest entries are dropped beyond the limit
+DOT_MATRIX_OVERLAY_CACHE_SIZE = 64
+_dot_matrix_overlay_cache: dict[tuple[float, float, bool, DotMatrixConfig], bytes] = {}
+
 
 def mm_to_points(millimeters: float) -> float:
     """Convert millimeters to PDF points."""
@@ -51,9 +83,13 @@ class DotMatrixConfig:
         """Get the dot radius in millimeters."""
         return self.dot_diameter_mm / 2
 
-    @property
+    @functools.cached_property
     def dot_color_rgb(self) -> tuple[float, float, float]:
-        """Convert hex color to RGB tuple (0-1 range for reportlab)."""
+        """Convert hex color to RGB tuple (0-1 range for reportlab).
+
+        Cached on first access; cached_property writes to the instance
+        __dict__ directly, so it works on the frozen dataclass.
+        """
         hex_color = self.dot_color_hex.lstrip("#")
         r = int(hex_color[0:2], 16) / 255
         g = int(hex_color[2:4], 16) / 255
@@ -84,31 +120,22 @@ def calculate_dot_positions(dimension_mm: float, spacing_mm: float) -> list[floa
 def create_half_white_overlay(
     width_pt: float,
     height_pt: float,
-    cover_side: str,
-) -> BytesIO:
-    """Create a PDF overlay with white rectangle covering half the page.
+    x0_pt: float,
+) -> bytes:
+    """Create a content stream with white rectangle covering half the page.
+
+    Output pages are assembled from content streams, so the single rectangle
+    is written directly rather than rendered as a separate PDF.
 
     Args:
         width_pt: Page width in points
         height_pt: Page height in points
-        cover_side: Which side to cover with white ("left" or "right")
+        x0_pt: Left edge of the covered half (0 for the left half, width / 2 for the right)
 
     Returns:
-        BytesIO containing the overlay PDF
+        Content stream data drawing the rectangle
     """
-    buffer = BytesIO()
-    canvas = Canvas(buffer, pagesize=(width_pt, height_pt))
-    canvas.setFillColorRGB(1, 1, 1)  # White
-
-    half_width = width_pt / 2
-    if cover_side == "left":
-        canvas.rect(0, 0, half_width, height_pt, stroke=0, fill=1)
-    else:  # cover_side == "right"
-        canvas.rect(half_width, 0, half_width, height_pt, stroke=0, fill=1)
-
-    canvas.save()
-    buffer.seek(0)
-    return buffer
+    return (WHITE_RECT_TEMPLATE % (x0_pt, 0, width_pt / 2, height_pt)).encode()
 
 
 def create_dot_matrix_overlay(
@@ -128,6 +155,8 @@ def create_dot_matrix_overlay(
     Returns:
         BytesIO containing the overlay PDF
     """
+    from reportlab.pdfgen.canvas import Canvas
+
     buffer = BytesIO()
     canvas = Canvas(buffer, pagesize=(width_pt, height_pt))
 
@@ -135,9 +164,13 @@ def create_dot_matrix_overlay(
     width_mm = points_to_mm(width_pt)
     height_mm = points_to_mm(height_pt)
 
-    # Calculate dot positions
-    x_positions = calculate_dot_positions(width_mm, config.dot_spacing_mm)
-    y_positions = calculate_dot_positions(height_mm, config.dot_spacing_mm)
+    # Calculate dot positions, converting each axis to points once
+    x_positions = [
+        mm_to_points(x_mm) for x_mm in calculate_dot_positions(width_mm, config.dot_spacing_mm)
+    ]
+    y_positions = [
+        mm_to_points(y_mm) for y_mm in calculate_dot_positions(height_mm, config.dot_spacing_mm)
+    ]
 
     # Set dot appearance
     r, g, b = config.dot_color_rgb
@@ -148,18 +181,27 @@ def create_dot_matrix_overlay(
 
     radius_pt = mm_to_points(config.dot_radius_mm)
 
-    # Draw dots at each intersection
-    for x_mm in x_positions:
-        for y_mm in y_positions:
-            x_pt = mm_to_points(x_mm)
-            y_pt = mm_to_points(y_mm)
-            canvas.circle(x_pt, y_pt, radius_pt, stroke=0, fill=1)
+    # Draw every dot as a subpath of one path and fill it once. The operators
+    # are joined and appended to the content stream instead of going through
+    # a canvas call (and a separate fill) per dot. The radius is fixed for the
+    # whole overlay, so each row and column's coordinates are formatted once.
+    handle_pt = CIRCLE_BEZIER_K * radius_pt
+    offsets_pt = (-radius_pt, -handle_pt, 0.0, handle_pt, radius_pt)
+    x_coords = [
+        tuple(f"{x_pt + offset_pt:.2f}" for offset_pt in offsets_pt) for x_pt in x_positions
+    ]
+    y_coords = [
+        tuple(f"{y_pt + offset_pt:.2f}" for offset_pt in offsets_pt) for y_pt in y_positions
+    ]
+    canvas._code.append("".join(
+        DOT_PATH_TEMPLATE.format(x=x, y=y) for x, y in itertools.product(x_coords, y_coords)
+    ) + "f")
 
     # Draw split border line if enabled
     if split_border and y_positions:
         center_x_pt = width_pt / 2
-        first_y_pt = mm_to_points(y_positions[0])
-        last_y_pt = mm_to_points(y_positions[-1])
+        first_y_pt = y_positions[0]
+        last_y_pt = y_positions[-1]
 
         # Line width matches dot diameter
         canvas.setLineWidth(mm_to_points(config.dot_diameter_mm))
@@ -171,6 +213,224 @@ def create_dot_matrix_overlay(
     return buffer
 
 
+def render_dot_matrix_overlay(
+    width_pt: float,
+    height_pt: float,
+    config: DotMatrixConfig,
+    split_border: bool,
+) -> bytes:
+    """Render the dot matrix overlay for one page size as PDF bytes."""
+    return create_dot_matrix_overlay(width_pt, height_pt, config, split_border).getvalue()
+
+
+def render_dot_matrix_overlays(
+    keys: list[tuple[float, float, bool]],
+    config: DotMatrixConfig,
+) -> dict[tuple[float, float, bool], bytes]:
+    """Render the dot matrix overlay for each unique (width, height, split_border).
+
+    Overlays rendered before are taken from the cache. When there are many
+    left to render and more than one CPU, they are rendered in a process
+    pool, as the ReportLab work is CPU bound; otherwise in-process, since
+    starting worker processes would cost more than it saves.
+    """
+    missing = [key for key in keys if (*key, config) not in _dot_matrix_overlay_cache]
+    workers = min(len(missing), os.cpu_count() or 1)
+
+    if len(missing) < MIN_POOLED_OVERLAYS or workers < 2:
+        rendered = [render_dot_matrix_overlay(*key[:2], config, key[2]) for key in missing]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        widths, heights, borders = zip(*missing)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rendered = list(
+                executor.map(
+                    render_dot_matrix_overlay, widths, heights, itertools.repeat(config), borders
+                )
+            )
+
+    for key, data in zip(missing, rendered):
+        _dot_matrix_overlay_cache[(*key, config)] = data
+    overlays = {key: _dot_matrix_overlay_cache[(*key, config)] for key in keys}
+
+    # Dicts keep insertion order, so the first keys are the oldest
+    for cache_key in list(_dot_matrix_overlay_cache)[:-DOT_MATRIX_OVERLAY_CACHE_SIZE]:
+        del _dot_matrix_overlay_cache[cache_key]
+
+    return overlays
+
+
+@dataclass
+class FormOverlay:
+    """An overlay page registered once in a writer as a shared Form XObject."""
+
+    name: NameObject  # Resource name pages use for the form
+    form: IndirectObject  # The Form XObject holding the overlay content
+    save_state: IndirectObject  # Content stream "q", placed before the page content
+    stamps: dict[NameObject, IndirectObject]  # Content stream "Q q /name Do Q" per resource name
+
+
+def _add_stream(writer: PdfWriter, data: bytes) -> IndirectObject:
+    """Add a content stream with the given data to the writer."""
+    from pypdf.generic import DecodedStreamObject
+
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return writer._add_object(stream)
+
+
+def register_form_overlay(writer: PdfWriter, overlay_page: PageObject, name: str) -> FormOverlay:
+    """Register an overlay page in the writer as a Form XObject.
+
+    The overlay content is stored once; every page it is applied to only
+    references it, instead of carrying its own copy as merge_page would.
+
+    Args:
+        writer: Writer the overlay will be used in
+        overlay_page: Page whose content and resources become the form
+        name: Resource name for the form, unique per overlay (e.g. "/DotMatrix0")
+
+    Returns:
+        FormOverlay to pass to apply_form_overlay
+    """
+    from pypdf.generic import (
+        ArrayObject,
+        DecodedStreamObject,
+        DictionaryObject,
+        EncodedStreamObject,
+        NameObject,
+        StreamObject,
+    )
+
+    streams = [
+        cast(StreamObject, stream.get_object()) for stream in _content_streams(overlay_page)
+    ]
+    form: StreamObject
+    if not streams:
+        # A page without content (e.g. a blank page) becomes an empty form
+        form = DecodedStreamObject()
+        form.set_data(b"")
+    elif len(streams) == 1 and isinstance(streams[0], EncodedStreamObject):
+        # A single stream is reused as stored, with its filters; decoding is
+        # only needed to join several. The copy is added to the writer.
+        form = cast(StreamObject, streams[0].clone(writer, force_duplicate=True))
+    else:
+        # Several streams are joined as if they were one, as PDF readers do
+        form = DecodedStreamObject()
+        form.set_data(b"\n".join(stream.get_data() for stream in streams))
+        form = form.flate_encode()
+    form[NameObject("/Type")] = NameObject("/XObject")
+    form[NameObject("/Subtype")] = NameObject("/Form")
+    form[NameObject("/BBox")] = ArrayObject(overlay_page.mediabox)
+    resources = overlay_page.get("/Resources", DictionaryObject())
+    form[NameObject("/Resources")] = resources.clone(writer)
+
+    return FormOverlay(
+        name=NameObject(name),
+        form=writer._add_object(form),
+        save_state=_add_stream(writer, b"q\n"),
+        stamps={},
+    )
+
+
+def apply_form_overlay(writer: PdfWriter, page: PageObject, overlay: FormOverlay) -> None:
+    """Draw a registered overlay on top of a page that belongs to the writer.
+
+    The page's own content streams are left as they are; they are wrapped in
+    q/Q so their graphics state can't leak into the overlay.
+    """
+    from pypdf.generic import ArrayObject, DictionaryObject, NameObject
+
+    # Resource dictionaries are extended in place rather than replaced: a
+    # replaced one would be left orphaned, and compress_identical_objects can
+    # drop a kept object along with orphans that share its hash. Sharing
+    # between pages is harmless since every overlay has its own name.
+    if "/Resources" not in page:
+        page[NameObject("/Resources")] = DictionaryObject()
+    resources = cast(DictionaryObject, page["/Resources"])
+    if "/XObject" not in resources:
+        resources[NameObject("/XObject")] = DictionaryObject()
+    xobjects = cast(DictionaryObject, resources["/XObject"])
+
+    # The page may already use the name for something else (e.g. it was processed before)
+    name = overlay.name
+    while name in xobjects and xobjects.raw_get(name) != overlay.form:
+        name = NameObject(f"{name}_")
+    xobjects[name] = overlay.form
+
+    # The stamp starts with a newline, as the page's last stream may end
+    # without one and the streams are read as if concatenated
+    stamp = overlay.stamps.get(name)
+    if stamp is None:
+        stamp = overlay.stamps[name] = _add_stream(writer, f"\nQ\nq {name} Do Q\n".encode())
+
+    page[NameObject("/Contents")] = ArrayObject(
+        [overlay.save_state, *_content_streams(page), stamp]
+    )
+
+
+def clone_annotations(writer: PdfWriter, source_page: PageObject, page: PageObject) -> None:
+    """Copy the annotations of a source page onto a page that belongs to the writer.
+
+    Each page gets its own copies, pointing back at it, as merge_page does.
+    Links between annotations of the page (a markup annotation's /Popup and
+    the popup's /Parent) are pointed at the copies made for the same page.
+    """
+    from pypdf.generic import ArrayObject, IndirectObject, NameObject
+
+    if "/Annots" not in source_page:
+        return
+    if "/Annots" not in page:
+        page[NameObject("/Annots")] = ArrayObject()
+    annots = cast(ArrayObject, page["/Annots"])
+
+    # Clone every annotation first, so that the links can be rewritten from
+    # this page's copies (source object number -> copy). The links are left
+    # out of the clones, as they would resolve to copies made for other pages.
+    copies = []
+    copy_refs: dict[int, IndirectObject] = {}
+    for source_ref in cast(ArrayObject, source_page["/Annots"]):
+        source = source_ref.get_object()
+        annot = source.clone(
+            writer,
+            ignore_fields=("/P", "/StructParent", "/Parent", "/Popup"),
+            force_duplicate=True,
+        )
+        # Annotations stored directly in the array have no reference yet
+        annot_ref = writer._add_object(annot)
+        annot[NameObject("/P")] = page.indirect_reference
+        if isinstance(source_ref, IndirectObject):
+            copy_refs[source_ref.idnum] = annot_ref
+        copies.append((source, annot))
+        annots.append(annot_ref)
+
+    for source, annot in copies:
+        for key in ("/Popup", "/Parent"):
+            link = source.raw_get(key) if key in source else None
+            if isinstance(link, IndirectObject) and link.idnum in copy_refs:
+                annot[NameObject(key)] = copy_refs[link.idnum]
+
+
+def _content_streams(page: PageObject) -> list[IndirectObject]:
+    """Get references to the content streams of a page, without decoding them."""
+    from pypdf.generic import ArrayObject
+
+    if "/Contents" not in page:
+        return []
+    contents = page.raw_get("/Contents")
+    if isinstance(contents.get_object(), ArrayObject):
+        return list(contents.get_object())
+    return [contents]
+
+
+def append_content_stream(page: PageObject, stream: IndirectObject) -> None:
+    """Draw a content stream that belongs to the writer on top of a page."""
+    from pypdf.generic import ArrayObject, NameObject
+
+    page[NameObject("/Contents")] = ArrayObject([*_content_streams(page), stream])
+
+
 def open_in_chrome(file_path: Path) -> None:
     """Open a PDF file in Chrome browser.
 
@@ -236,6 +496,15 @@ def load_config_from_toml(config_path: Path = Path("config.toml")) -> DotMatrixC
     if not config_path.exists():
         return DotMatrixConfig()
 
+    # Keyed on the modification time so that an edited file is read again
+    return _load_config_from_toml(config_path, config_path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_from_toml(config_path: Path, mtime_ns: int) -> DotMatrixConfig:
+    """Parse a TOML configuration file, cached per path and modification time."""
+    import tomli
+
     try:
         with open(config_path, "rb") as f:
             data = tomli.load(f)
@@ -265,6 +534,99 @@ def load_config_from_toml(config_path: Path = Path("config.toml")) -> DotMatrixC
         return DotMatrixConfig()
 
 
+def build_output_writer(
+    input_path: Path,
+    config: DotMatrixConfig,
+    split: bool = False,
+    split_border: bool = False,
+) -> PdfWriter:
+    """Read a PDF file and build a writer holding its pages with the overlay applied.
+
+    Args:
+        input_path: Path to the input PDF file
+        config: Dot matrix configuration
+        split: If True, split each page horizontally into two output pages
+        split_border: If True (and split is True), draw a border line at center
+
+    Returns:
+        PdfWriter with the output pages
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    # Read the whole file up front so that object lookups are served from memory
+    reader = PdfReader(BytesIO(input_path.read_bytes()))
+
+    # In normal mode the output pages are the input pages, so clone the whole
+    # document in one pass instead of page by page
+    writer = PdfWriter() if split else PdfWriter(clone_from=reader)
+
+    # A clone of a file without /Info has none either, which
+    # compress_identical_objects can't handle
+    if writer.metadata is None:
+        writer.metadata = {}
+
+    # Page sizes from MediaBox, and the same rounded as overlay lookup keys so
+    # that pages of the same size share one overlay
+    page_sizes = [
+        (float(page.mediabox.width), float(page.mediabox.height)) for page in reader.pages
+    ]
+    size_keys = [(round(width_pt, 3), round(height_pt, 3)) for width_pt, height_pt in page_sizes]
+
+    # Only add split border when both split and split_border are enabled
+    border = split and split_border
+
+    # Render and register one dot matrix overlay per unique page size.
+    # Fully transparent dots (and border) would draw nothing, so skip them.
+    dot_keys = []
+    if config.opacity > 0.0:
+        dot_keys = list(dict.fromkeys((*size_key, border) for size_key in size_keys))
+    dot_overlays = {
+        key: register_form_overlay(writer, PdfReader(BytesIO(data)).pages[0], f"/DotMatrix{index}")
+        for index, (key, data) in enumerate(render_dot_matrix_overlays(dot_keys, config).items())
+    }
+    white_streams: dict[tuple[float, float, float], IndirectObject] = {}
+
+    pages = reader.pages if split else writer.pages
+    for page, (width_pt, height_pt), size_key in zip(pages, page_sizes, size_keys):
+        dot_overlay = dot_overlays.get((*size_key, border))
+
+        if split:
+            # Register the original page once; both output pages reference it.
+            # Each output page has its own resources, so the name needn't be unique.
+            source_overlay = register_form_overlay(writer, page, "/SourcePage")
+
+            # Create two output pages per input page: the left half (right side
+            # covered), then the right half (left side covered)
+            for cover_x0_pt in (width_pt / 2, 0.0):
+                white_key = (width_pt, height_pt, cover_x0_pt)
+                white_stream = white_streams.get(white_key)
+                if white_stream is None:
+                    white_stream = white_streams[white_key] = _add_stream(
+                        writer, create_half_white_overlay(width_pt, height_pt, cover_x0_pt)
+                    )
+
+                output_page = writer.add_blank_page(width=width_pt, height=height_pt)
+
+                # Original page content goes UNDER the white overlay
+                apply_form_overlay(writer, output_page, source_overlay)
+                append_content_stream(output_page, white_stream)
+                clone_annotations(writer, page, output_page)
+
+                # Apply dot matrix overlay on top
+                if dot_overlay is not None:
+                    apply_form_overlay(writer, output_page, dot_overlay)
+        else:
+            # Normal mode: just add dot matrix overlay to the cloned page
+            if dot_overlay is not None:
+                apply_form_overlay(writer, page, dot_overlay)
+
+    # The writer's translation table keeps every reader it cloned from alive in
+    # case more objects get cloned. Nothing else is cloned from here on.
+    writer.reset_translation()
+
+    return writer
+
+
 def process_pdf(
     input_path: Path,
     output_path: Path,
@@ -281,45 +643,18 @@ def process_pdf(
         split: If True, split each page horizontally into two output pages
         split_border: If True (and split is True), draw a border line at center
     """
-    reader = PdfReader(input_path)
-    writer = PdfWriter()
-
-    for page in reader.pages:
-        # Get page dimensions from MediaBox
-        media_box = page.mediabox
-        width_pt = float(media_box.width)
-        height_pt = float(media_box.height)
-
-        # Create dot matrix overlay for this page's dimensions
-        # Only add split border when both split and split_border are enabled
-        dot_overlay_buffer = create_dot_matrix_overlay(
-            width_pt, height_pt, config, split_border=(split and split_border)
-        )
-
-        if split:
-            # Create two output pages per input page
-            for cover_side in ("right", "left"):
-                # Start with white overlay as base, merge original page UNDER it
-                white_buffer = create_half_white_overlay(width_pt, height_pt, cover_side)
-                white_reader = PdfReader(white_buffer)
-                output_page = white_reader.pages[0]
+    writer = build_output_writer(input_path, config, split=split, split_border=split_border)
 
-                # Merge original page content UNDER the white overlay
-                output_page.merge_page(page, over=False)
+    # The input and overlay readers are unreachable now. pypdf objects point
+    # back to their document, so collect the cycles rather than keep the
+    # parsed input alive next to the output while writing.
+    gc.collect()
 
-                # Apply dot matrix overlay on top
-                dot_overlay_buffer.seek(0)
-                dot_reader = PdfReader(dot_overlay_buffer)
-                output_page.merge_page(dot_reader.pages[0])
-
-                writer.add_page(output_page)
-        else:
-            # Normal mode: just add dot matrix overlay
-            dot_reader = PdfReader(dot_overlay_buffer)
-            page.merge_page(dot_reader.pages[0])
-            writer.add_page(page)
+    # Overlay pages of the same size produce identical objects; keep one copy of each
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
 
-    with open(output_path, "wb") as output_file:
+    # Large buffer so pypdf's many small object writes don't each hit the OS
+    with open(output_path, "wb", buffering=1 << 20) as output_file:
         writer.write(output_file)
 
 